@@ -1,7 +1,8 @@
-import json, os, asyncio, datetime, re
-from typing import List, Dict
-import requests
-from bs4 import BeautifulSoup
+import json, os, asyncio, datetime, re, itertools, email.utils
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+import httpx
+from lxml import etree
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 # ------- CONFIG FROM ENV -------
@@ -11,57 +12,253 @@ NAICS_CODE    = os.getenv("NAICS_CODE", "531311")
 PSC_CODE      = os.getenv("PSC_CODE", "R799")
 DAYS_BACK     = int(os.getenv("DAYS_BACK", "30"))
 MAX_PAGES     = int(os.getenv("MAX_PAGES", "3"))
-STATE_FILE    = os.getenv("STATE_FILE", "fpds_seen.json")
+STATE_FILE    = os.getenv("STATE_FILE", "fpds_seen.txt")
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", str(os.cpu_count() or 1)))
 
 ADVANCED_SEARCH_URL = "https://www.fpds.gov/fpdsng_cms/index.php/en/advanced-search.html"
+ATOM_FEED_URL = "https://www.fpds.gov/ezsearch/FEEDS/ATOM"
+ATOM_PAGE_SIZE = 10      # FPDS serves the public feed 10 entries at a time
+ATOM_MAX_ENTRIES = int(os.getenv("ATOM_MAX_ENTRIES", "5000"))  # safety cap; normally a short page ends the scan
+ATOM_TIMEOUT_S = 30
 RESULTS_WAIT_MS = 45000  # increased to 45 seconds
+PAGE_WAIT_MS = 10000     # per Next click; pages after the first are already warm
+NOT_DISABLED = ':not([disabled]):not([aria-disabled="true"]):not(.disabled)'
+DISCORD_EMBEDS_PER_POST = 10  # webhook limit
+DISCORD_MAX_ATTEMPTS = 5      # per post, counting retries after a 429
+DISCORD_MAX_RETRY_WAIT_S = 30.0
+LOCATOR_TIMEOUT_MS = 500  # per-candidate first try in safe_fill/safe_type/click_first_that_exists
+LEGACY_STATE_FILE = "fpds_seen.json"  # pre-newline-format state, migrated on first load
+AWARD_ID_PREFIX = "award:"  # award:<PIID>:<modNumber> (see award_key); older state holds free-form IDs
 # --------------------------------
 
+DATE_RE = re.compile(r"\d{2}/\d{2}/\d{4}")
+
+# Shared in-page helper: the table with the most rows is taken to be the results table
+_JS_BEST_TABLE = """
+    const bestTable = () => {
+        let best = null, maxRows = 1;
+        for (const t of document.querySelectorAll("table")) {
+            const n = t.querySelectorAll("tr").length;
+            if (n > maxRows) { best = t; maxRows = n; }
+        }
+        return best;
+    };
+"""
+
+# Runs in the page: return the raw rows build_results expects
+JS_TABLE_EXTRACTOR = "() => {" + _JS_BEST_TABLE + """
+    const best = bestTable();
+    if (!best) return null;
+    const text = el => (el.innerText || el.textContent || "").replace(/\\s+/g, " ").trim();
+    return {
+        headers: [...best.querySelectorAll("th")].map(text),
+        rows: [...best.querySelectorAll("tr")].map(tr => {
+            const a = tr.querySelector("a[href]");
+            return {
+                cells: [...tr.querySelectorAll("td")].map(text),
+                href: a ? a.getAttribute("href") : null,
+                link_text: a ? text(a) : "",
+            };
+        }),
+    };
+}
+"""
+
+# Text of the current results table (or null), and a predicate that it has been replaced since
+JS_RESULTS_SIGNATURE = "() => {" + _JS_BEST_TABLE + """
+    const best = bestTable();
+    return best ? best.innerText : null;
+}
+"""
+JS_RESULTS_CHANGED = "prev => {" + _JS_BEST_TABLE + """
+    const best = bestTable();
+    return best !== null && best.innerText !== prev;
+}
+"""
+
 def date_range_last_n_days(n: int):
     today = datetime.date.today()
     start = today - datetime.timedelta(days=n)
     return start.strftime("%m/%d/%Y"), today.strftime("%m/%d/%Y")
 
 def load_seen() -> set:
+    """Seen IDs, one per line in STATE_FILE.
+
+    A JSON list from before the newline format (in STATE_FILE itself, e.g. an old
+    STATE_FILE=fpds_seen.json setting, or in LEGACY_STATE_FILE) is migrated once.
+    """
     try:
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return set(data) if isinstance(data, list) else set()
+        path = STATE_FILE if os.path.exists(STATE_FILE) else LEGACY_STATE_FILE
+        if not os.path.exists(path):
+            return set()
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        if text.lstrip().startswith("["):
+            data = json.loads(text)
+            seen = {" ".join(str(x).split()) for x in data} if isinstance(data, list) else set()
+            compact_seen(seen)
+            return seen
+        lines = [line for line in text.split("\n") if line.strip()]
+        seen = set(lines)
+        if len(seen) < len(lines):
+            # Appends never repeat a known ID, so duplicates mean a past load failed; clean up once
+            compact_seen(seen)
+        return seen
     except Exception:
         pass
     return set()
 
-def save_seen(seen: set):
+def compact_seen(seen: set):
+    """Rewrite STATE_FILE deduped and sorted (legacy migration / duplicate cleanup only)."""
     try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(sorted(list(seen)), f, ensure_ascii=False, indent=2)
+        tmp = STATE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{rid}\n" for rid in sorted(seen))
+        os.replace(tmp, STATE_FILE)
     except Exception:
         pass
 
-def send_discord(content: str):
-    if not DISCORD_WEBHOOK_URL:
-        print("No DISCORD_WEBHOOK set; printing instead:\n", content)
-        return
+def save_seen(new_ids: List[str]):
+    """Append only this run's new IDs; the existing file is never rewritten here."""
+    try:
+        if new_ids:
+            with open(STATE_FILE, "a", encoding="utf-8") as f:
+                f.writelines(f"{rid}\n" for rid in new_ids)
+    except Exception:
+        pass
+
+# One pooled client for every webhook post in the run (keeps the TLS connection alive)
+_discord_client = httpx.AsyncClient(timeout=20, http2=True)
+
+def _retry_after_seconds(resp) -> float:
+    """Seconds to wait after a 429: body retry_after, else Retry-After (seconds or HTTP-date), else 1s; capped."""
+    wait = None
+    try:
+        wait = float(resp.json()["retry_after"])
+    except Exception:
+        header = resp.headers.get("Retry-After", "")
+        try:
+            wait = float(header)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(header)
+                wait = (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            except Exception:
+                pass
+    if wait is None or wait != wait:  # unparseable or NaN
+        wait = 1.0
+    return min(max(wait, 0.0), DISCORD_MAX_RETRY_WAIT_S)
+
+async def _webhook_status(payload: Dict) -> int:
+    """POST one webhook payload, waiting out 429s (retry_after); return the final HTTP status.
+
+    Never raises: a transport or other failure is logged and reported as 0 so callers can still save state.
+    """
     try:
-        requests.post(DISCORD_WEBHOOK_URL, json={"content": content}, timeout=20)
+        for _ in range(DISCORD_MAX_ATTEMPTS):
+            resp = await _discord_client.post(DISCORD_WEBHOOK_URL, json=payload)
+            if resp.status_code == 429:
+                await asyncio.sleep(_retry_after_seconds(resp))
+                continue
+            if not resp.is_success:
+                print(f"Discord error: HTTP {resp.status_code} {resp.text[:200]}")
+            return resp.status_code
+        print(f"Discord error: still rate limited after {DISCORD_MAX_ATTEMPTS} attempts")
+        return 429
     except Exception as e:
         print("Discord error:", e)
+    return 0
+
+def _rejected(status: int) -> bool:
+    """Discord refused the payload itself; sending it again unchanged will not help."""
+    return 400 <= status < 500 and status != 429
+
+async def _post_webhook(payload: Dict) -> bool:
+    return 200 <= await _webhook_status(payload) < 300
+
+async def send_discord(content: str) -> bool:
+    if not DISCORD_WEBHOOK_URL:
+        print("No DISCORD_WEBHOOK set; printing instead:\n", content)
+        return True
+    return await _post_webhook({"content": content})
+
+def _embed_as_text(embed: Dict) -> str:
+    return "\n".join(filter(None, (embed["title"], embed["description"], embed["url"])))[:2000]
+
+async def _send_one_embed(embed: Dict) -> Optional[bool]:
+    """Deliver a single embed, falling back to plain content; None if Discord refuses both."""
+    status = await _webhook_status({"embeds": [embed]})
+    if 200 <= status < 300:
+        return True
+    if not _rejected(status):
+        return False
+    status = await _webhook_status({"content": _embed_as_text(embed)})
+    if 200 <= status < 300:
+        return True
+    return None if _rejected(status) else False
+
+async def send_discord_embeds(items: List[Tuple[str, Dict]]) -> List[str]:
+    """Post (id, embed) pairs DISCORD_EMBEDS_PER_POST at a time, in order; return the IDs that are done.
+
+    Chunks go out one after another so rate limits are waited out rather than tripped.
+    A chunk Discord refuses (4xx) is retried one embed at a time so a single bad item can't
+    hold back the rest; items refused even as plain text are alerted on and counted as done
+    so they are not retried forever. Transient failures leave IDs unsaved for the next run.
+    """
+    if not DISCORD_WEBHOOK_URL:
+        for _, e in items:
+            print("No DISCORD_WEBHOOK set; printing instead:\n", _embed_as_text(e))
+        return [rid for rid, _ in items]
+
+    delivered, refused = [], []
+    for i in range(0, len(items), DISCORD_EMBEDS_PER_POST):
+        chunk = items[i:i + DISCORD_EMBEDS_PER_POST]
+        status = await _webhook_status({"embeds": [e for _, e in chunk]})
+        if 200 <= status < 300:
+            delivered.extend(rid for rid, _ in chunk)
+            continue
+        if not _rejected(status):
+            continue
+        for rid, e in chunk:
+            sent = await _send_one_embed(e)
+            if sent:
+                delivered.append(rid)
+            elif sent is None:
+                refused.append(rid)
+
+    if refused:
+        print("Discord refused these awards permanently:", ", ".join(refused))
+        await send_discord(f"⚠️ FPDS monitor: Discord refused {len(refused)} award notice(s); marked seen: " + ", ".join(refused)[:1800])
+    return delivered + refused
+
+def _candidate(page, sel: str):
+    """First element for a CSS/text selector or a 'label:<text>' shorthand."""
+    if sel.startswith("label:"):
+        return page.get_by_label(sel.split("label:", 1)[1], exact=False).first
+    return page.locator(sel).first
+
+async def _act(locator, action) -> bool:
+    """Run action(timeout) with the short LOCATOR_TIMEOUT_MS budget, checking and acting in one call.
+
+    Only if that times out is count() asked whether the element is merely not ready yet;
+    a present element then gets Playwright's normal timeout, an absent one returns False.
+    """
+    try:
+        await action(LOCATOR_TIMEOUT_MS)
+        return True
+    except PlaywrightTimeoutError:
+        if not await locator.count():
+            return False
+    await action(None)
+    return True
 
 async def safe_fill(page, candidates: List[str], value: str) -> bool:
     """Try multiple selectors/labels to fill a field; return True on first success."""
     for sel in candidates:
         try:
-            if sel.startswith("label:"):
-                label_text = sel.split("label:", 1)[1]
-                locator = page.get_by_label(label_text, exact=False)
-                await locator.fill(value)
+            locator = _candidate(page, sel)
+            if await _act(locator, lambda t: locator.fill(value, timeout=t)):
                 return True
-            else:
-                locator = page.locator(sel)
-                if await locator.count() > 0:
-                    await locator.first.fill(value)
-                    return True
         except Exception:
             continue
     return False
@@ -70,20 +267,12 @@ async def safe_type(page, candidates: List[str], value: str) -> bool:
     """Type into date fields that can be picky; return True on first success."""
     for sel in candidates:
         try:
-            if sel.startswith("label:"):
-                label_text = sel.split("label:", 1)[1]
-                locator = page.get_by_label(label_text, exact=False)
-                await locator.click()
+            locator = _candidate(page, sel)
+            if await _act(locator, lambda t: locator.click(timeout=t)):
+                # The click proved the field is there and actionable
                 await locator.fill("")
                 await locator.type(value)
                 return True
-            else:
-                locator = page.locator(sel)
-                if await locator.count() > 0:
-                    await locator.first.click()
-                    await locator.first.fill("")
-                    await locator.first.type(value)
-                    return True
         except Exception:
             continue
     return False
@@ -91,60 +280,80 @@ async def safe_type(page, candidates: List[str], value: str) -> bool:
 async def click_first_that_exists(page, candidates: List[str]) -> bool:
     for sel in candidates:
         try:
-            locator = page.locator(sel)
-            if await locator.count() > 0:
-                await locator.first.click()
+            locator = page.locator(sel).first
+            if await _act(locator, lambda t: locator.click(timeout=t)):
                 return True
         except Exception:
             continue
     return False
 
-def parse_results_table(html: str) -> List[Dict]:
-    """Parse the largest table on the page as FPDS results and extract basic fields."""
-    soup = BeautifulSoup(html, "html.parser")
+def award_key(piid: str, mod: str, date_signed: str = "", amount: str = "") -> str:
+    """Stable ID shared by the feed and table paths: one per contract action (PIID + modification).
+
+    An unknown modification number is not assumed to be the base award ("0"); the signed date
+    and amount stand in for it so different mods of one PIID keep distinct keys.
+    """
+    piid = piid.strip().upper()
+    if mod.strip():
+        return f"{AWARD_ID_PREFIX}{piid}:{mod.strip().upper()}"
+    return f"{AWARD_ID_PREFIX}{piid}:?{date_signed.strip()}|{amount.strip()}"
+
+def _link_award_params(href: str) -> Tuple[str, str]:
+    """PIID and modNumber from an FPDS view link's query string, if it carries them."""
+    params = {k.lower(): v for k, v in parse_qs(urlparse(href or "").query).items()}
+    return (params.get("piid") or [""])[0], (params.get("modnumber") or [""])[0]
+
+def classify_headers(headers: List[str]) -> Dict[str, List[int]]:
+    """Work out once which columns can supply date/vendor/amount/PIID/mod, in column order."""
+    role_cols = {"date": [], "vendor": [], "amount": [], "piid": [], "mod": []}
+    for idx, head in enumerate(headers):
+        h = head.lower()
+        if "date" in h:
+            role_cols["date"].append(idx)
+        elif re.search(r"\bmod(ification)?\b", h):  # "Mod Number"/"Modification Number", not "Model"/"Commodity"
+            role_cols["mod"].append(idx)
+        if "piid" in h or "award id" in h or "contract id" in h:
+            role_cols["piid"].append(idx)
+        if "vendor" in h or "contractor" in h:
+            role_cols["vendor"].append(idx)
+        if "amount" in h or "value" in h:
+            role_cols["amount"].append(idx)
+    return role_cols
+
+def _first_cell(row_texts: List[str], cols) -> str:
+    return next((row_texts[i] for i in cols if i < len(row_texts) and row_texts[i]), "")
+
+def build_results(headers: List[str], rows: List[Dict]) -> List[Dict]:
+    """Turn raw results-table rows into result dicts.
+
+    Each row is {"cells": [td text, ...], "href": first link href or None, "link_text": its text}.
+    """
     results = []
-
-    tables = soup.find_all("table")
-    best_table, max_rows = None, 0
-    for t in tables:
-        rows = t.find_all("tr")
-        if len(rows) > max_rows and len(rows) > 1:
-            best_table, max_rows = t, len(rows)
-    if not best_table:
-        return results
-
-    headers = [th.get_text(strip=True) for th in best_table.find_all("th")]
-    for tr in best_table.find_all("tr"):
-        tds = tr.find_all("td")
-        if not tds:
+    role_cols = classify_headers(headers)
+    amount_cols = set(role_cols["amount"])
+    for row in rows:
+        row_texts = row["cells"]
+        if not row_texts:
             continue
 
-        row_texts = [td.get_text(" ", strip=True) for td in tds]
-        row_links = [a for a in tr.find_all("a", href=True)]
-        link = row_links[0]["href"] if row_links else ""
-        title = row_links[0].get_text(strip=True) if row_links else "FPDS Result"
-
-        # Make a best-effort ID
-        award_id = title or (row_links[0]["href"].rsplit("/",1)[-1] if row_links else "|".join(row_texts)[:120])
-
-        vendor = ""
-        date_signed = ""
-        amount = ""
-
-        # Map columns if we can
-        for idx, head in enumerate(headers):
-            val = row_texts[idx] if idx < len(row_texts) else ""
-            h = head.lower()
-            if "date" in h and not date_signed:
-                date_signed = val
-            if ("vendor" in h or "contractor" in h) and not vendor:
-                vendor = val
-            if ("amount" in h or "value" in h or "$" in val) and not amount:
-                amount = val
+        has_link = row.get("href") is not None
+        link = row["href"] if has_link else ""
+        title = row.get("link_text", "") if has_link else "FPDS Result"
+
+        # Key on PIID + modification like the feed does; the old best-effort ID is kept for legacy state
+        legacy_id = (title or (link.rpartition("/")[2] if has_link else "|".join(row_texts)[:120])).strip()
+        piid, mod = _link_award_params(link)
+        piid = piid or _first_cell(row_texts, role_cols["piid"])
+        mod = mod or _first_cell(row_texts, role_cols["mod"])
+
+        # Map columns if we can (amount: first amount/value column or cell showing a $, in column order)
+        date_signed = _first_cell(row_texts, role_cols["date"])
+        vendor = _first_cell(row_texts, role_cols["vendor"])
+        amount = next((v for i, v in enumerate(row_texts[:len(headers)]) if v and (i in amount_cols or "$" in v)), "")
 
         # Fallback date from any MM/DD/YYYY in row text
         if not date_signed:
-            m = re.search(r"\d{2}/\d{2}/\d{4}", " ".join(row_texts))
+            m = DATE_RE.search(" ".join(row_texts))
             if m:
                 date_signed = m.group(0)
 
@@ -152,10 +361,11 @@ def parse_results_table(html: str) -> List[Dict]:
         if link.startswith("/"):
             link = "https://www.fpds.gov" + link
         elif link and not link.startswith("http"):
-            link = "https://www.fpds.gov/" + link.lstrip("./")
+            link = "https://www.fpds.gov/" + (link[2:] if link.startswith("./") else link)
 
         results.append({
-            "id": award_id.strip(),
+            "id": award_key(piid, mod, date_signed, amount) if piid else legacy_id,
+            "legacy_ids": [legacy_id] if piid else [],
             "title": title or "FPDS Result",
             "vendor": vendor,
             "date": date_signed,
@@ -164,126 +374,324 @@ def parse_results_table(html: str) -> List[Dict]:
         })
     return results
 
-async def run_once() -> List[Dict]:
-    start_date, end_date = date_range_last_n_days(DAYS_BACK)
+def _first_text(el, name: str) -> str:
+    found = el.xpath(f".//*[local-name()='{name}']/text()")
+    return found[0].strip() if found else ""
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        ctx = await browser.new_context()
-        page = await ctx.new_page()
+def parse_atom_feed(xml: bytes) -> List[Dict]:
+    """Extract the same fields as the results-table scrape from an FPDS ATOM feed page."""
+    results = []
+    root = etree.fromstring(xml)
+    for entry in root.iterfind("{http://www.w3.org/2005/Atom}entry"):
+        title = entry.findtext("{http://www.w3.org/2005/Atom}title", "").strip()
+        link_el = entry.find("{http://www.w3.org/2005/Atom}link")
+        link = link_el.get("href", "") if link_el is not None else ""
+
+        # signedDate looks like 2024-05-01 00:00:00; match the MM/DD/YYYY of the table path
+        date_signed = _first_text(entry, "signedDate")[:10]
+        try:
+            date_signed = datetime.datetime.strptime(date_signed, "%Y-%m-%d").strftime("%m/%d/%Y")
+        except ValueError:
+            pass
 
-        # 1) Advanced Search page
-        await page.goto(ADVANCED_SEARCH_URL, wait_until="domcontentloaded")
-
-        # 2) Fill fields (robust attempts; FPDS markup can change)
-        await safe_fill(page, [
-            'label:Contracting Agency', 'input[placeholder*="Agency"]',
-            'input[name*="agency"]', 'input[id*="agency"]'
-        ], AGENCY_NAME)
-
-        await safe_fill(page, [
-            'label:NAICS', 'input[placeholder*="NAICS"]',
-            'input[name*="naics"]', 'input[id*="naics"]'
-        ], NAICS_CODE)
-
-        await safe_fill(page, [
-            'label:PSC', 'input[placeholder*="PSC"]',
-            'input[name*="psc"]', 'input[id*="psc"]'
-        ], PSC_CODE)
-
-        # Dates (Signed From / To)
-        await safe_type(page, [
-            'label:Date Signed From', 'label:Signed From',
-            'label:From Date', 'input[placeholder*="From"]',
-            'input[name*="dateFrom"]', 'input[id*="dateFrom"]'
-        ], start_date)
-
-        await safe_type(page, [
-            'label:Date Signed To', 'label:Signed To',
-            'label:To Date', 'input[placeholder*="To"]',
-            'input[name*="dateTo"]', 'input[id*="dateTo"]'
-        ], end_date)
-
-        # 3) Search
-        await click_first_that_exists(page, [
-            'button:has-text("Search")', 'input[type="submit"]',
-            'button[type="submit"]', 'text=Search'
-        ])
-
-        # 4) Wait for results to render (be generous; FPDS can be slow)
-        await page.wait_for_timeout(1500)  # small pause for initial layout
+        amount = _first_text(entry, "obligatedAmount")
         try:
-            # Try common table selectors
-            await page.wait_for_selector(
-                'table, #searchResults table, table.results, div.results table',
-                state='visible',
-                timeout=RESULTS_WAIT_MS
-            )
-        except PlaywrightTimeoutError:
-            # Friendly notice instead of crashing
-            send_discord(f"⚠️ FPDS monitor: no results table appeared within {RESULTS_WAIT_MS/1000:.0f}s (site slow or no data).")
-            await ctx.close(); await browser.close()
-            return []
+            amount = f"${float(amount):,.2f}"
+        except ValueError:
+            pass
+
+        # The award's own awardContractID/IDVID comes before any referenced IDV in document order
+        link_piid, link_mod = _link_award_params(link)
+        piid = _first_text(entry, "PIID") or link_piid
+        mod = _first_text(entry, "modNumber") or link_mod
+        results.append({
+            "id": award_key(piid, mod, date_signed, amount) if piid else title,
+            # Earlier runs keyed feed items on the bare PIID and table rows on the link text
+            "legacy_ids": [x for x in (piid, title) if x],
+            "title": title or "FPDS Result",
+            "vendor": _first_text(entry, "vendorName"),
+            "date": date_signed,
+            "amount": amount,
+            "link": link or "https://www.fpds.gov",
+        })
+    return results
 
-        # 5) Parse first page
-        html = await page.content()
-        results = parse_results_table(html)
-        if not results:
-            # Table exists but no rows parsed—might be empty results or layout change
-            send_discord("ℹ️ FPDS monitor: results table found but no rows parsed (filters may have no matches).")
-
-        # 6) Pagination
-        pages_done = 1
-        while pages_done < MAX_PAGES:
-            moved = await click_first_that_exists(page, [
-                'a[rel="next"]', 'a:has-text("Next")',
-                'button:has-text("Next")', 'li.next a'
-            ])
-            if not moved:
-                break
-            try:
-                await page.wait_for_load_state("domcontentloaded", timeout=RESULTS_WAIT_MS)
-            except PlaywrightTimeoutError:
-                pass
-            html = await page.content()
-            more = parse_results_table(html)
-            results.extend(more)
-            pages_done += 1
+def build_feed_query(query: Dict) -> str:
+    start_date, end_date = date_range_last_n_days(DAYS_BACK)
+    # ezsearch wants YYYY/MM/DD date bounds
+    start, end = (datetime.datetime.strptime(d, "%m/%d/%Y").strftime("%Y/%m/%d") for d in (start_date, end_date))
+    return (
+        f'CONTRACTING_AGENCY_NAME:"{query["agency"]}" '
+        f'PRINCIPAL_NAICS_CODE:"{query["naics"]}" '
+        f'PRODUCT_OR_SERVICE_CODE:"{query["psc"]}" '
+        f'SIGNED_DATE:[{start},{end}]'
+    )
+
+async def fetch_feed(client: httpx.AsyncClient, query: Dict) -> List[Dict]:
+    """Pull every result for one query from the public ATOM feed (no browser needed).
+
+    The feed is not ordered by signed date, so it is read to the end (a short page)
+    rather than stopping after MAX_PAGES like the browser path.
+    """
+    q = build_feed_query(query)
+    results = []
+    for start in range(0, ATOM_MAX_ENTRIES, ATOM_PAGE_SIZE):
+        resp = await client.get(ATOM_FEED_URL, params={"FEEDNAME": "PUBLIC", "q": q, "start": start})
+        resp.raise_for_status()
+        entries = parse_atom_feed(resp.content)
+        results.extend(entries)
+        if len(entries) < ATOM_PAGE_SIZE:
+            break
+    else:
+        print(f"ATOM feed for {describe_query(query)} hit ATOM_MAX_ENTRIES={ATOM_MAX_ENTRIES}; later entries skipped.")
+    return results
 
-        await ctx.close()
-        await browser.close()
+async def scan_feed(client: httpx.AsyncClient, query: Dict, sem: asyncio.Semaphore) -> Optional[List[Dict]]:
+    """Return feed results, or None if the feed failed and the browser should be used."""
+    async with sem:
+        try:
+            return await fetch_feed(client, query)
+        except Exception as e:
+            # Any feed problem (HTTP, malformed XML, unexpected layout) just means: use the browser
+            print(f"ATOM feed failed for {describe_query(query)}: {e!r}; falling back to browser.")
+            return None
+
+class Scraper:
+    """Owns one headless Chromium for the whole run; each query gets its own context."""
+
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self._playwright = None
+        self.browser = None
+
+    async def __aenter__(self) -> "Scraper":
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.browser.close()
+        await self._playwright.stop()
+
+def describe_query(query: Dict) -> str:
+    return f"{query['agency']} / NAICS {query['naics']} / PSC {query['psc']}"
+
+def split_env_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+def build_queries() -> List[Dict]:
+    """Every AGENCY_NAME x NAICS_CODE x PSC_CODE combination (each may be comma-separated)."""
+    return [
+        {"agency": agency, "naics": naics, "psc": psc}
+        for agency, naics, psc in itertools.product(
+            split_env_list(AGENCY_NAME), split_env_list(NAICS_CODE), split_env_list(PSC_CODE)
+        )
+    ]
+
+async def scan(browser, query: Dict, sem: asyncio.Semaphore) -> List[Dict]:
+    async with sem:
+        return await run_once(browser, query)
+
+async def _fill_form(page, query: Dict):
+    """Open Advanced Search and fill the query + date range (submitted by _wait_results).
+
+    Raises if any filter could not be set, so the query fails instead of running unfiltered.
+    """
+    start_date, end_date = date_range_last_n_days(DAYS_BACK)
 
-    return results
+    # 1) Advanced Search page
+    await page.goto(ADVANCED_SEARCH_URL, wait_until="domcontentloaded")
+
+    # 2) Fill fields (robust attempts; FPDS markup can change)
+    missing = []
+    if not await safe_fill(page, [
+        'label:Contracting Agency', 'input[placeholder*="Agency"]',
+        'input[name*="agency"]', 'input[id*="agency"]'
+    ], query["agency"]):
+        missing.append("agency")
+
+    if not await safe_fill(page, [
+        'label:NAICS', 'input[placeholder*="NAICS"]',
+        'input[name*="naics"]', 'input[id*="naics"]'
+    ], query["naics"]):
+        missing.append("NAICS")
+
+    if not await safe_fill(page, [
+        'label:PSC', 'input[placeholder*="PSC"]',
+        'input[name*="psc"]', 'input[id*="psc"]'
+    ], query["psc"]):
+        missing.append("PSC")
+
+    # Dates (Signed From / To)
+    if not await safe_type(page, [
+        'label:Date Signed From', 'label:Signed From',
+        'label:From Date', 'input[placeholder*="From"]',
+        'input[name*="dateFrom"]', 'input[id*="dateFrom"]'
+    ], start_date):
+        missing.append("signed-from date")
+
+    if not await safe_type(page, [
+        'label:Date Signed To', 'label:Signed To',
+        'label:To Date', 'input[placeholder*="To"]',
+        'input[name*="dateTo"]', 'input[id*="dateTo"]'
+    ], end_date):
+        missing.append("signed-to date")
+
+    if missing:
+        raise RuntimeError(f"could not fill {', '.join(missing)} on the Advanced Search form")
+
+async def _click_and_wait_for_results(page, candidates: List[str], timeout_ms: int) -> Optional[bool]:
+    """Click the first control that exists and wait until the results table is replaced.
+
+    Comparing against the table seen before the click avoids matching a form layout table
+    or the previous page's rows, whether FPDS navigates or re-renders in place.
+    Returns None if there was nothing to click, False if the table never changed.
+    """
+    before = await page.evaluate(JS_RESULTS_SIGNATURE)
+    if not await click_first_that_exists(page, candidates):
+        return None
+    try:
+        await page.wait_for_function(JS_RESULTS_CHANGED, arg=before, timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+async def _wait_results(page) -> bool:
+    """Submit the search and wait for a results table to render (be generous; FPDS can be slow)."""
+    # 3) Search, 4) wait for results
+    found = await _click_and_wait_for_results(page, [
+        'button:has-text("Search")', 'input[type="submit"]',
+        'button[type="submit"]', 'text=Search'
+    ], RESULTS_WAIT_MS)
+    if found:
+        return True
+    if found is None:
+        await send_discord("⚠️ FPDS monitor: no Search button found on the Advanced Search page (layout change?).")
+        return False
+    # Friendly notice instead of crashing
+    await send_discord(f"⚠️ FPDS monitor: no results table appeared within {RESULTS_WAIT_MS/1000:.0f}s (site slow or no data).")
+    return False
+
+async def _scrape_table(page) -> List[Dict]:
+    """Read the largest table as FPDS results in a single page.evaluate round-trip."""
+    data = await page.evaluate(JS_TABLE_EXTRACTOR)
+    if not data:
+        return []
+    return build_results(data["headers"], data["rows"])
+
+async def _collect_pages(page) -> List[Dict]:
+    """Scrape the current results page, then follow Next up to MAX_PAGES."""
+    per_page = [await _scrape_table(page)]
+    while len(per_page) < MAX_PAGES:
+        # Disabled Next controls are skipped; an inert one only costs PAGE_WAIT_MS, and
+        # pagination stops rather than re-reading the same rows
+        moved = await _click_and_wait_for_results(page, [
+            f'a[rel="next"]{NOT_DISABLED}', f'a:has-text("Next"){NOT_DISABLED}',
+            f'button:has-text("Next"){NOT_DISABLED}', f'li.next:not(.disabled) a{NOT_DISABLED}'
+        ], PAGE_WAIT_MS)
+        if not moved:
+            break
+        per_page.append(await _scrape_table(page))
+
+    if not per_page[0]:
+        # Table exists but no rows parsed—might be empty results or layout change
+        await send_discord("ℹ️ FPDS monitor: results table found but no rows parsed (filters may have no matches).")
+    return list(itertools.chain.from_iterable(per_page))
+
+async def run_once(browser, query: Dict) -> List[Dict]:
+    # A fresh context per query is cheap; the browser itself is shared
+    ctx = await browser.new_context()
+    try:
+        page = await ctx.new_page()
+        await _fill_form(page, query)
+        if not await _wait_results(page):
+            return []
+        return await _collect_pages(page)
+    finally:
+        await ctx.close()
 
 async def main():
     seen = load_seen()
     start_date, end_date = date_range_last_n_days(DAYS_BACK)
+    queries = build_queries()
+    sem = asyncio.Semaphore(max(1, MAX_CONCURRENCY))
     try:
-        results = await run_once()
+        # The ATOM feed carries the same award data without a browser; try it first
+        async with httpx.AsyncClient(timeout=ATOM_TIMEOUT_S, follow_redirects=True) as client:
+            feed_results = await asyncio.gather(*[scan_feed(client, q, sem) for q in queries], return_exceptions=True)
+
+        per_query, fallback = [], []
+        for q, r in zip(queries, feed_results):
+            if isinstance(r, list):
+                per_query.append(r)
+            else:
+                fallback.append(q)
+
+        failed = []
+        if fallback:
+            async with Scraper() as scraper:
+                # Queries run side by side in separate contexts; CPU is the limit, so cap by cores.
+                # Failures are collected per query so siblings keep their results and their pages.
+                browser_results = await asyncio.gather(
+                    *[scan(scraper.browser, q, sem) for q in fallback], return_exceptions=True
+                )
+            for q, r in zip(fallback, browser_results):
+                if isinstance(r, BaseException):
+                    if not isinstance(r, Exception):
+                        raise r
+                    failed.append(q)
+                    await send_discord(f"❗ FPDS monitor error for {describe_query(q)}: `{r}`")
+                else:
+                    per_query.append(r)
+        results = list(itertools.chain.from_iterable(per_query))
     except Exception as e:
-        send_discord(f"❗ FPDS monitor error: `{e}`")
+        await send_discord(f"❗ FPDS monitor error: `{e}`")
         return
 
+    if not results and len(failed) == len(queries):
+        # Every query already reported its own error; a "no results" notice would be misleading
+        return
     if not results:
-        send_discord(f"⚠️ No FPDS results found for this run ({start_date} – {end_date}).")
+        await send_discord(f"⚠️ No FPDS results found for this run ({start_date} – {end_date}).")
         return
 
-    new_count = 0
+    # Until the state holds award:<PIID>:<mod> keys, old-style IDs stand in for them (one-time migration).
+    # After that they are ignored, or every later modification of a known contract would look seen.
+    migrating = not any(x.startswith(AWARD_ID_PREFIX) for x in seen)
+    new_items, migrated_ids = [], []
     for r in results:
-        rid = (r.get("id") or "").strip()
+        rid = " ".join((r.get("id") or "").split())  # one ID per line in the state file
+        if rid and rid not in seen and migrating and rid.startswith(AWARD_ID_PREFIX) and any(
+            " ".join(legacy.split()) in seen for legacy in r.get("legacy_ids", ())
+        ):
+            seen.add(rid)
+            migrated_ids.append(rid)
+            continue
         if rid and rid not in seen:
-            parts = [f"🆕 **{r.get('title') or 'FPDS Result'}**"]
+            parts = []
             if r.get("vendor"): parts.append(f"Vendor: {r['vendor']}")
             if r.get("date"): parts.append(f"Date: {r['date']}")
             if r.get("amount"): parts.append(f"Amount: {r['amount']}")
-            parts.append(r.get("link") or "https://www.fpds.gov")
-            send_discord("\n".join(parts))
+            new_items.append((rid, {
+                "title": f"🆕 {r.get('title') or 'FPDS Result'}"[:256],
+                "description": "\n".join(parts),
+                "url": r.get("link") or "https://www.fpds.gov",
+            }))
             seen.add(rid)
-            new_count += 1
 
-    if new_count == 0:
-        send_discord("ℹ️ No new FPDS items since last check.")
-    save_seen(seen)
+    delivered = []
+    if new_items:
+        # Only IDs Discord actually accepted are saved; the rest are retried next run
+        delivered = await send_discord_embeds(new_items)
+    else:
+        await send_discord("ℹ️ No new FPDS items since last check.")
+    save_seen(migrated_ids + delivered)
+
+async def _main():
+    try:
+        await main()
+    finally:
+        await _discord_client.aclose()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(_main())
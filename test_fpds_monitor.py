@@ -0,0 +1,216 @@
+import asyncio
+
+import httpx
+import pytest
+
+import fpds_monitor as m
+
+FEED_ENTRY = """
+<entry>
+  <title>DELIVERY ORDER {piid} awarded to ACME</title>
+  <link rel="alternate" href="https://www.fpds.gov/ezsearch/jsp/viewLinkController.jsp?PIID={piid}&amp;modNumber={mod}"/>
+  <content type="application/xml">
+    <ns1:award xmlns:ns1="http://www.fpdsng.com/FPDS">
+      <ns1:awardID>
+        <ns1:awardContractID><ns1:PIID>{piid}</ns1:PIID><ns1:modNumber>{mod}</ns1:modNumber></ns1:awardContractID>
+        <ns1:referencedIDVID><ns1:PIID>IDV999</ns1:PIID><ns1:modNumber>P00009</ns1:modNumber></ns1:referencedIDVID>
+      </ns1:awardID>
+      <ns1:relevantContractDates><ns1:signedDate>2025-01-02 00:00:00</ns1:signedDate></ns1:relevantContractDates>
+      <ns1:dollarValues><ns1:obligatedAmount>12345.5</ns1:obligatedAmount></ns1:dollarValues>
+      <ns1:vendor><ns1:vendorHeader><ns1:vendorName>ACME INC</ns1:vendorName></ns1:vendorHeader></ns1:vendor>
+    </ns1:award>
+  </content>
+</entry>
+"""
+
+
+def feed(*entries):
+    body = "".join(FEED_ENTRY.format(piid=piid, mod=mod) for piid, mod in entries)
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{body}</feed>'.encode()
+
+
+def row(cells, href=None, link_text=""):
+    return {"cells": cells, "href": href, "link_text": link_text}
+
+
+def test_parse_atom_feed_fields():
+    [r] = m.parse_atom_feed(feed(("N001", "P00001")))
+    assert r["id"] == "award:N001:P00001"
+    assert r["vendor"] == "ACME INC"
+    assert r["date"] == "01/02/2025"
+    assert r["amount"] == "$12,345.50"
+    assert "N001" in r["legacy_ids"]
+
+
+def test_build_results_keys_from_link():
+    [r] = m.build_results(
+        ["Award", "Vendor"],
+        [row(["N001", "Acme"], "/ezsearch/jsp/viewLinkController.jsp?PIID=N001&modNumber=P00001", "N001")],
+    )
+    assert r["id"] == "award:N001:P00001"
+    assert r["legacy_ids"] == ["N001"]
+    assert r["link"].startswith("https://www.fpds.gov/ezsearch/")
+
+
+def test_build_results_keys_from_columns():
+    [r] = m.build_results(["Award ID", "Mod Number", "Date Signed"], [row(["N001", "P00002", "01/02/2025"])])
+    assert r["id"] == "award:N001:P00002"
+
+
+def test_feed_and_table_share_key():
+    [from_feed] = m.parse_atom_feed(feed(("N001", "P00001")))
+    [from_table] = m.build_results(
+        ["Award"], [row(["N001"], "viewLinkController.jsp?PIID=N001&modNumber=P00001", "N001")]
+    )
+    assert from_feed["id"] == from_table["id"]
+
+
+def test_unknown_mod_is_not_the_base_award():
+    results = m.build_results(
+        ["Award ID", "Date Signed", "Amount"],
+        [row(["N001", "01/02/2025", "$5"]), row(["N001", "02/03/2025", "$7"])],
+    )
+    ids = [r["id"] for r in results]
+    assert len(set(ids)) == 2
+    assert all(not i.endswith(":0") for i in ids)
+
+
+@pytest.mark.parametrize("header,is_mod", [
+    ("Mod Number", True),
+    ("Modification Number", True),
+    ("Model Number", False),
+    ("Commodity", False),
+    ("Last Modified Date", False),
+])
+def test_classify_headers_mod_column(header, is_mod):
+    assert bool(m.classify_headers([header])["mod"]) is is_mod
+
+
+def run_main(monkeypatch, tmp_path, entries):
+    monkeypatch.setattr(m, "STATE_FILE", str(tmp_path / "fpds_seen.txt"))
+    monkeypatch.setattr(m, "LEGACY_STATE_FILE", str(tmp_path / "fpds_seen.json"))
+    monkeypatch.setattr(m, "DISCORD_WEBHOOK_URL", None)
+
+    async def scan_feed(client, query, sem):
+        return m.parse_atom_feed(feed(*entries))
+
+    monkeypatch.setattr(m, "scan_feed", scan_feed)
+    asyncio.run(m.main())
+    return (tmp_path / "fpds_seen.txt").read_text().split()
+
+
+def test_main_migrates_legacy_ids_without_posting(monkeypatch, tmp_path, capsys):
+    (tmp_path / "fpds_seen.txt").write_text("N001\n")
+    saved = run_main(monkeypatch, tmp_path, [("N001", "P00001")])
+    assert saved == ["N001", "award:N001:P00001"]
+    assert "🆕" not in capsys.readouterr().out
+
+
+def test_main_posts_new_mod_after_migration(monkeypatch, tmp_path, capsys):
+    (tmp_path / "fpds_seen.txt").write_text("N001\naward:N001:P00001\n")
+    saved = run_main(monkeypatch, tmp_path, [("N001", "P00001"), ("N001", "P00002")])
+    assert saved[-1] == "award:N001:P00002"
+    out = capsys.readouterr().out
+    assert out.count("🆕") == 1
+
+
+def post_with(monkeypatch, handler, payload):
+    monkeypatch.setattr(m, "DISCORD_WEBHOOK_URL", "https://discord.test/hook")
+    monkeypatch.setattr(m, "_discord_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(m, "DISCORD_MAX_RETRY_WAIT_S", 0.01)
+    return asyncio.run(m._post_webhook(payload))
+
+
+@pytest.mark.parametrize("retry_after", ["soon", "Wed, 21 Oct 2015 07:28:00 GMT", "5"])
+def test_post_webhook_tolerates_any_retry_after(monkeypatch, retry_after):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": retry_after}, text="slow down")
+        return httpx.Response(204)
+
+    assert post_with(monkeypatch, handler, {"content": "hi"}) is True
+    assert len(calls) == 2
+
+
+def test_post_webhook_never_raises(monkeypatch):
+    def handler(request):
+        raise RuntimeError("boom")
+
+    assert post_with(monkeypatch, handler, {"content": "hi"}) is False
+
+
+def embed_items(*titles):
+    return [(t, {"title": t, "description": "", "url": "https://www.fpds.gov"}) for t in titles]
+
+
+def test_one_bad_embed_does_not_block_its_chunk(monkeypatch):
+    posts = []
+
+    def handler(request):
+        payload = request.read().decode()
+        posts.append(payload)
+        return httpx.Response(400 if "BAD" in payload and "refused" not in payload else 204)
+
+    monkeypatch.setattr(m, "DISCORD_WEBHOOK_URL", "https://discord.test/hook")
+    monkeypatch.setattr(m, "_discord_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    done = asyncio.run(m.send_discord_embeds(embed_items("A", "BAD", "C")))
+    assert sorted(done) == ["A", "BAD", "C"]
+    assert "refused 1 award" in posts[-1]
+
+
+def test_transient_failure_leaves_chunk_unsaved(monkeypatch):
+    monkeypatch.setattr(m, "DISCORD_WEBHOOK_URL", "https://discord.test/hook")
+    monkeypatch.setattr(m, "_discord_client", httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(503))))
+    assert asyncio.run(m.send_discord_embeds(embed_items("A", "B"))) == []
+
+
+def test_load_seen_migrates_json_in_state_file(monkeypatch, tmp_path):
+    state = tmp_path / "fpds_seen.json"
+    state.write_text('[\n  "A",\n  "B  C"\n]')
+    monkeypatch.setattr(m, "STATE_FILE", str(state))
+    monkeypatch.setattr(m, "LEGACY_STATE_FILE", str(tmp_path / "missing.json"))
+    assert m.load_seen() == {"A", "B C"}
+    m.save_seen(["D"])
+    assert state.read_text().split("\n") == ["A", "B C", "D", ""]
+    assert m.load_seen() == {"A", "B C", "D"}
+
+
+class FakeLocator:
+    def __init__(self, present=True, ready_after_short=True):
+        self.present, self.ready = present, ready_after_short
+        self.first = self
+        self.calls = []
+
+    async def fill(self, value, timeout=None):
+        self.calls.append(("fill", timeout))
+        if not self.present or (timeout is not None and not self.ready):
+            raise m.PlaywrightTimeoutError("timeout")
+
+    async def count(self):
+        self.calls.append(("count", None))
+        return int(self.present)
+
+
+class FakePage:
+    def __init__(self, locators):
+        self.locators = locators
+
+    def locator(self, sel):
+        return self.locators[sel]
+
+
+def test_safe_fill_acts_in_one_call_when_ready():
+    ready = FakeLocator()
+    assert asyncio.run(m.safe_fill(FakePage({"#a": ready}), ["#a"], "v")) is True
+    assert ready.calls == [("fill", m.LOCATOR_TIMEOUT_MS)]
+
+
+def test_safe_fill_waits_normally_for_present_but_slow_field():
+    slow, absent = FakeLocator(ready_after_short=False), FakeLocator(present=False)
+    assert asyncio.run(m.safe_fill(FakePage({"#a": absent, "#b": slow}), ["#a", "#b"], "v")) is True
+    assert absent.calls == [("fill", m.LOCATOR_TIMEOUT_MS), ("count", None)]
+    assert slow.calls[-1] == ("fill", None)